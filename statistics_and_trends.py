@@ -8,37 +8,81 @@ Make use of the functions presented in the lectures
 and ensure your code is PEP-8 compliant, including docstrings.
 """
 
-# Import libraries
-import matplotlib.pyplot as plt
+# Import libraries, plotting libraries are imported where they are used
+import os
+import pathlib
+import tempfile
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
-import seaborn as sns
 
-# Ignore useless warning
-import warnings
-warnings.simplefilter(action='ignore', category=FutureWarning)
+# Columns used by the analysis, loaded from the CSV with compact dtypes
+DATA_COLUMNS = ['type', 'title', 'country', 'date_added',
+                'release_year', 'duration']
+DATA_DTYPES = {'type': 'category', 'country': 'category',
+               'date_added': 'string', 'duration': 'string',
+               'release_year': 'int32'}
+
+# Bump whenever the loaded columns or the preprocessing output change,
+# so that existing Feather caches are rebuilt once
+CACHE_VERSION = 1
+
+
+def correlation_matrix(numeric_df):
+    """
+    Compute the Pearson correlation matrix of the numerical columns
+    with a single np.corrcoef call, returned as a labelled DataFrame.
+    Falls back to corr() when values are missing.
+    """
 
+    # np.corrcoef cannot drop missing values pairwise like corr() does
+    if numeric_df.isna().any().any():
+        return numeric_df.corr()
 
-def plot_relational_plot(df):
+    values = numeric_df.to_numpy(dtype=np.float64, copy=False)
+    corr = np.atleast_2d(np.corrcoef(values, rowvar=False))
+
+    return pd.DataFrame(corr, index=numeric_df.columns,
+                        columns=numeric_df.columns)
+
+
+def plot_relational_plot(df, ax=None):
     """
     Create a relational plot showing the evolution
     of the number of movies added per year.
     A line plot is used to visualize the trend over time.
+    Draws onto ax when given, otherwise saves its own figure.
     """
 
+    # Import the plotting libraries only when a plot is drawn
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    import seaborn as sns
+
     # Check if 'date_added' column exists
     if 'date_added' in df.columns:
-        # Convert to datetime, coerce errors
-        df['date_added'] = pd.to_datetime(df['date_added'], errors='coerce')
-        # Extract the year from the date_added column
-        df['year_added'] = df['date_added'].dt.year
-        # Count the movies added each year
-        yearly_counts = df['year_added'].value_counts().sort_index()
-
-        # Set up the figure size
-        fig, ax = plt.subplots(figsize=(10, 6))
+        # Extract the year from the parsed date_added column
+        years = df['date_added'].dt.year.dropna().to_numpy(dtype=np.int32)
+        # Count the movies added each year, offset from the first year,
+        # leaving the plot empty when no date could be parsed
+        base = years.min() if years.size else 0
+        counts = np.bincount(years - base)
+        year_index = np.arange(base, base + counts.size)
+        # Keep only the years in which movies were added
+        mask = counts > 0
+
+        # Set up the figure size, unless drawing onto a shared axes
+        standalone = ax is None
+        if standalone:
+            # Own Agg canvas rather than pyplot, safe to draw from a thread
+            fig = Figure(figsize=(10, 6))
+            FigureCanvasAgg(fig)
+            ax = fig.subplots()
 
         # Create a line plot with blue color gradient
-        sns.lineplot(x=yearly_counts.index, y=yearly_counts.values,
+        sns.lineplot(x=year_index[mask], y=counts[mask],
                      marker='o', ax=ax, color='blue')
 
         # Set the title and axis labels with specific font sizes and weight
@@ -50,31 +94,57 @@ def plot_relational_plot(df):
         ax.yaxis.label.set_fontsize(14)
 
         # Rotate x-axis labels for better readability
-        plt.xticks(rotation=45)
+        ax.tick_params(axis='x', labelrotation=45)
 
-        # Ensure tight layout and save the figure
-        plt.tight_layout()
-        plt.savefig('relational_plot.png')
-        plt.show()
+        # Apply a fixed layout and save the figure
+        if standalone:
+            fig.subplots_adjust(left=0.1, right=0.95, top=0.9, bottom=0.15)
+            fig.savefig('relational_plot.png', dpi=100, bbox_inches=None)
         return
 
 
-def plot_categorical_plot(df):
+def plot_categorical_plot(df, ax=None):
     """
     Create a categorical plot (bar plot) showing the
     top 10 countries with the most movies.
+    Draws onto ax when given, otherwise saves its own figure.
     """
 
-    if 'country' in df.columns:
-        # Get top 10 countries with most movies
-        top_countries = df['country'].value_counts().head(10)
-
-        # Set up the figure size
-        fig, ax = plt.subplots(figsize=(10, 6))
+    # Import the plotting libraries only when a plot is drawn
+    import matplotlib as mpl
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
 
-        # Create a bar plot with a blue color gradient
-        sns.barplot(x=top_countries.values, y=top_countries.index,
-                    palette='viridis', ax=ax)
+    if 'country' in df.columns:
+        # Count the movies per country from the category codes set up in
+        # preprocessing, skipping the -1 code used for missing values
+        country = df['country'].astype('category')
+        codes = country.cat.codes.to_numpy()
+        categories = country.cat.categories
+        counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+
+        # Get top 10 countries with most movies, largest first, ranking
+        # only countries still present and breaking ties in category order
+        present = np.flatnonzero(counts)
+        order = np.argsort(-counts[present], kind='stable')
+        top_idx = present[order[:10]]
+        top_countries = pd.Series(counts[top_idx],
+                                  index=categories.to_numpy()[top_idx])
+
+        # Set up the figure size, unless drawing onto a shared axes
+        standalone = ax is None
+        if standalone:
+            # Own Agg canvas rather than pyplot, safe to draw from a thread
+            fig = Figure(figsize=(10, 6))
+            FigureCanvasAgg(fig)
+            ax = fig.subplots()
+
+        # Create a bar plot with a viridis gradient, sampled like seaborn's
+        # palette, and list the largest country at the top
+        colors = mpl.colormaps['viridis'](
+            np.linspace(0, 1, len(top_countries) + 2)[1:-1])
+        ax.barh(top_countries.index, top_countries.values, color=colors)
+        ax.set_ylim(len(top_countries) - 0.5, -0.5)
 
         # Set the title and axis labels with specific font sizes and weight
         ax.set(xlabel="Number of Movies", ylabel="Country",
@@ -84,41 +154,101 @@ def plot_categorical_plot(df):
         ax.xaxis.label.set_fontsize(14)
         ax.yaxis.label.set_fontsize(14)
 
-        # Ensure tight layout and save the figure
-        plt.tight_layout()
-        plt.savefig('categorical_plot.png')
-        plt.show()
+        # Apply a fixed layout and save the figure
+        if standalone:
+            fig.subplots_adjust(left=0.17, right=0.95, top=0.9, bottom=0.12)
+            fig.savefig('categorical_plot.png', dpi=100, bbox_inches=None)
         return
 
 
-def plot_statistical_plot(df):
+def plot_statistical_plot(df, ax=None, corr=None):
     """
     Create a statistical plot (correlation heatmap)
     to visualize correlations between numerical variables.
+    Draws onto ax when given, otherwise saves its own figure.
+    A precomputed correlation matrix may be passed as corr.
     """
 
-    # Select only numerical columns
-    numeric_df = df.select_dtypes(include=['number'])
+    # Import the plotting library only when a plot is drawn
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    # Correlate the numerical columns unless already computed
+    if corr is None:
+        corr = correlation_matrix(df.select_dtypes(include=['number']))
 
-    # Set up the figure size
-    fig, ax = plt.subplots(figsize=(15, 6))
+    # Set up the figure size, unless drawing onto a shared axes
+    standalone = ax is None
+    if standalone:
+        # Own Agg canvas rather than pyplot, safe to draw from a thread
+        fig = Figure(figsize=(15, 6))
+        FigureCanvasAgg(fig)
+        ax = fig.subplots()
 
     # Create a heatmap with a blue color gradient for correlation
-    sns.heatmap(numeric_df.corr(), annot=True, cmap='Blues',
-                linewidths=0.5, ax=ax)
+    mat = corr.to_numpy()
+    im = ax.imshow(mat, cmap='Blues', aspect='auto')
+    ax.figure.colorbar(im, ax=ax)
+
+    # Label the cells with the column names and annotate each value,
+    # using white text on the darker half of the colour scale
+    ax.set_xticks(np.arange(mat.shape[1]), labels=corr.columns)
+    ax.set_yticks(np.arange(mat.shape[0]), labels=corr.index)
+    threshold = (mat.min() + mat.max()) / 2
+    for i, j in np.ndindex(mat.shape):
+        ax.text(j, i, f'{mat[i, j]:.2f}', ha='center', va='center',
+                color='white' if mat[i, j] > threshold else 'black')
 
     # Set the title with specific font sizes and weight
     ax.set_title('Correlation Heatmap of Numeric Variables')
     ax.title.set_fontsize(20)
     ax.title.set_fontweight('bold')
 
-    # Ensure tight layout and save the figure
-    plt.tight_layout()
-    plt.savefig('statistical_plot.png')
-    plt.show()
+    # Apply a fixed layout and save the figure
+    if standalone:
+        fig.subplots_adjust(left=0.1, right=0.95, top=0.9, bottom=0.1)
+        fig.savefig('statistical_plot.png', dpi=100, bbox_inches=None)
     return
 
 
+def streaming_moments(x, block_size=65536):
+    """
+    Compute the count, mean and the second to fourth central moment sums
+    of x in a single pass, merging per-block moments with the pairwise
+    update of Chan et al. so that only one block is held in temporaries.
+    """
+
+    n = 0
+    mean = M2 = M3 = M4 = 0.0
+    for start in range(0, x.size, block_size):
+        block = x[start:start + block_size]
+
+        # Moments of the current block around its own mean
+        nb = block.size
+        mb = block.mean()
+        d = block - mb
+        d2 = d * d
+        M2b = d2.sum()
+        M3b = (d2 * d).sum()
+        M4b = (d2 * d2).sum()
+
+        # Merge the block into the running moments
+        na = n
+        n = na + nb
+        delta = mb - mean
+        M4 = (M4 + M4b
+              + delta ** 4 * na * nb * (na * na - na * nb + nb * nb) / n ** 3
+              + 6 * delta ** 2 * (na * na * M2b + nb * nb * M2) / n ** 2
+              + 4 * delta * (na * M3b - nb * M3) / n)
+        M3 = (M3 + M3b
+              + delta ** 3 * na * nb * (na - nb) / n ** 2
+              + 3 * delta * (na * M2b - nb * M2) / n)
+        M2 = M2 + M2b + delta ** 2 * na * nb / n
+        mean = mean + delta * nb / n
+
+    return n, mean, M2, M3, M4
+
+
 def statistical_analysis(df, col):
     """
     Perform statistical analysis on a given column:
@@ -126,21 +256,45 @@ def statistical_analysis(df, col):
     and excess kurtosis.
     """
 
-    # Calculate statistical moments
-    mean = df[col].mean()
-    stddev = df[col].std()
-    skew = df[col].skew()
-    excess_kurtosis = df[col].kurtosis() - 3
+    # Gather the non-missing values as a float64 array
+    x = df[col].to_numpy(dtype=np.float64, copy=False)
+    x = x[~np.isnan(x)]
+
+    # Calculate the central moments in one streaming pass
+    n, mean, M2, M3, M4 = streaming_moments(x)
+    # Without any values every moment is undefined
+    if n == 0:
+        return np.nan, np.nan, np.nan, np.nan
+
+    # Treat floating-point noise as zero spread, as pandas does, so a
+    # constant column has zero skewness and kurtosis
+    constant = abs(M2) < 1e-14
+
+    # Sample standard deviation, adjusted skewness and adjusted
+    # excess kurtosis, the same estimators and guards as pandas
+    stddev = np.sqrt(M2 / (n - 1)) if n >= 2 else np.nan
+    if n < 3:
+        skew = np.nan
+    elif constant:
+        skew = 0.0
+    else:
+        skew = np.sqrt(n * (n - 1)) / (n - 2) * (M3 / n) / (M2 / n) ** 1.5
+    if n < 4:
+        excess_kurtosis = np.nan
+    elif constant:
+        excess_kurtosis = 0.0
+    else:
+        g2 = n * M4 / M2 ** 2 - 3
+        excess_kurtosis = (((n + 1) * g2 + 6) * (n - 1)
+                           / ((n - 2) * (n - 3)))
 
     return mean, stddev, skew, excess_kurtosis
 
 
-def preprocessing(df):
+def print_insights(df):
     """
-    Preprocess the data by cleaning missing values,
-    converting appropriate columns,
-    and providing quick insights using describe(),
-    head(), and corr().
+    Provide quick insights into the dataset using
+    head(), describe(), and corr().
     """
 
     # Print preview of the first rows of the dataset
@@ -155,18 +309,38 @@ def preprocessing(df):
     numeric_df = df.select_dtypes(include=['number'])
     print("\nCorrelation matrix:")
     # To avoid errors with non-numeric data
-    print(numeric_df.corr())
+    print(correlation_matrix(numeric_df))
+
+
+def preprocessing(df, verbose=False):
+    """
+    Preprocess the data by cleaning missing values,
+    converting appropriate columns,
+    and, when verbose, providing quick insights using
+    describe(), head(), and corr().
+    """
+
+    if verbose:
+        print_insights(df)
+
+    # Keep 'country' categorical, a no-op when read_csv already did so
+    df = df.astype({'country': 'category'})
 
     # Drop rows with missing values in essential columns
-    df.dropna(subset=['release_year', 'duration', 'country'],
-              inplace=True)
+    mask = df[['release_year', 'duration', 'country']].notna().\
+        to_numpy().all(axis=1)
+    df = df.loc[mask].reset_index(drop=True)
 
-    # Convert 'duration' to numeric by extracting minutes
-    df['duration'] = df['duration'].astype(str).\
-        str.extract(r'(\d+)').astype(float)
+    # Convert 'duration' to numeric minutes, float32 is precise enough
+    df['duration'] = df['duration'].str.extract(r'(\d+)', expand=False).\
+        to_numpy(dtype=np.float32, na_value=np.nan)
 
-    # Ensure 'release_year' is an integer
-    df['release_year'] = df['release_year'].astype(int)
+    # Parse 'date_added' once, some values carry a leading space
+    df['date_added'] = pd.to_datetime(df['date_added'].str.strip(),
+                                      errors='coerce', format='%B %d, %Y')
+
+    # Ensure 'release_year' is a compact integer, years fit in int16
+    df['release_year'] = df['release_year'].astype('int16')
 
     return df
 
@@ -202,18 +376,105 @@ def writing(moments, col):
         print(f'The data was {skewness_desc} and {kurtosis_desc}.')
 
 
+def read_cache(cache):
+    """
+    Read the preprocessed DataFrame from the Feather cache, returning
+    None when the file is unreadable or was written for a different
+    CACHE_VERSION, so that the CSV is parsed again.
+    """
+
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    # A damaged or partially written cache is treated as missing
+    try:
+        table = feather.read_table(cache)
+    except (OSError, pa.ArrowException):
+        return None
+
+    metadata = table.schema.metadata or {}
+    if metadata.get(b'cache_version') != str(CACHE_VERSION).encode():
+        return None
+
+    return table.to_pandas()
+
+
+def write_cache(df, cache):
+    """
+    Write the preprocessed DataFrame to the Feather cache, tagged with
+    CACHE_VERSION, via a temporary file that atomically replaces it.
+    """
+
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'cache_version'] = str(CACHE_VERSION).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    # Write next to the cache so the final rename stays on one filesystem
+    fd, tmp = tempfile.mkstemp(prefix=cache.name + '.', suffix='.tmp',
+                               dir=cache.parent)
+    os.close(fd)
+    try:
+        feather.write_feather(table, tmp)
+        os.replace(tmp, cache)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def load_data(path='data.csv', cache='data.feather', verbose=False):
+    """
+    Load the preprocessed dataset, parsing and preprocessing the CSV
+    only when the Feather cache is missing, older than the CSV,
+    unreadable, or was written for a different CACHE_VERSION.
+    The DataFrame summary, and the insights when verbose, are printed
+    for the raw CSV when it is parsed, otherwise for the cached data.
+    """
+
+    path = pathlib.Path(path)
+    cache = pathlib.Path(cache)
+
+    # Reuse the cached columnar copy to skip CSV parsing on reruns
+    if cache.exists() and cache.stat().st_mtime >= path.stat().st_mtime:
+        df = read_cache(cache)
+        if df is not None:
+            df.info()
+            if verbose:
+                print_insights(df)
+            return df
+
+    # Only load the columns used by the analysis, with compact dtypes
+    df = pd.read_csv(path, usecols=DATA_COLUMNS, dtype=DATA_DTYPES)
+    df.info()
+    df = preprocessing(df, verbose=verbose)
+    write_cache(df, cache)
+
+    return df
+
+
 def main():
     """
     Main function to load data, preprocess it,
     and generate the plots and statistical analysis.
     """
-    df = pd.read_csv('data.csv')
-    df.info()
-    df = preprocessing(df)
+    # Ignore useless warning
+    warnings.simplefilter(action='ignore', category=FutureWarning)
+
+    df = load_data()
     col = 'duration'
-    plot_relational_plot(df)
-    plot_statistical_plot(df)
-    plot_categorical_plot(df)
+    # Select the numerical columns and correlate them once for the heatmap
+    numeric_cols = df.select_dtypes(include=['number']).columns
+    corr = correlation_matrix(df[numeric_cols])
+    # Each plot draws its own figure, so render them concurrently
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(plot_relational_plot, df),
+                   executor.submit(plot_statistical_plot, df, corr=corr),
+                   executor.submit(plot_categorical_plot, df)]
+        for future in futures:
+            future.result()
     moments = statistical_analysis(df, col)
     writing(moments, col)
     return